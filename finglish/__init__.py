@@ -1,2 +1,2 @@
-from .f2p import f2p, f2p_list, f2p_word
+from .f2p import f2p, f2p_list, f2p_word, f2p_words_batch
 from .f2p import dictionary as f2p_dictionary
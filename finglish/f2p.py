@@ -15,10 +15,18 @@ Files required in the same directory:
 import sys
 import os
 import re
+import string
 import itertools
+import heapq
+from functools import lru_cache
+import marisa_trie
 
-# Regex to split text into words, punctuation, and whitespace
-word_and_punct_regex = re.compile(r'\w+|[^\w\s]|\s+')
+# Regex to split text into words (w), punctuation (p), and whitespace (s).
+# Runs of word characters containing an underscore are not words and are kept as-is.
+word_and_punct_regex = re.compile(r'(?P<p>\w*_\w*|[^\w\s])|(?P<w>\w+)|(?P<s>\s+)')
+
+# Punctuation with a Persian equivalent, applied to the whole converted phrase
+_PUNCT_TABLE = str.maketrans({'?': '؟', ',': '،'})
 
 def get_resource_path(filename):
     """Get path to resource, works for dev and for PyInstaller"""
@@ -39,136 +47,199 @@ def load_conversion_file(filename):
         filename (str): The filename to load.
 
     Returns:
-        dict: Mapping from Finglish letters to possible Persian equivalents.
+        dict: Mapping from Finglish letters to tuples of possible Persian equivalents.
+        The placeholder 'nothing' is loaded as the empty string.
     """
     filename = get_resource_path(filename)
     with open(filename, encoding='utf-8') as f:
-        l = list(f)
-        l = [i for i in l if i.strip()]
-        l = [i.strip().split() for i in l]
-    return {i[0]: i[1:] for i in l}
+        return {i[0]: tuple(sys.intern('' if x == 'nothing' else x) for x in i[1:])
+                for line in f if (i := line.split())}
 
 # Load conversion tables and word lists at module import
 beginning = load_conversion_file('f2p-beginning.txt')  # type: dict
 middle = load_conversion_file('f2p-middle.txt')        # type: dict
 ending = load_conversion_file('f2p-ending.txt')        # type: dict
 
+# Stored as a trie: shared prefixes keep it compact and it answers prefix queries directly.
+# Each word maps to a list of (frequency,) records; _NO_FREQ stands in for missing words.
+_NO_FREQ = [(0,)]
 with open(get_resource_path('persian-word-freq.txt'), encoding='utf-8') as f:
-    word_freq = list(f)
-word_freq = [i.strip() for i in word_freq if i.strip()]
-word_freq = [i.split() for i in word_freq if not i.startswith('#')]
-word_freq = {i[0]: int(i[1]) for i in word_freq}  # type: dict[str, int]
+    word_freq = marisa_trie.RecordTrie('<I', ((i[0], (int(i[1]),)) for line in f
+                                              if (i := line.split()) and not i[0].startswith('#')))  # type: marisa_trie.RecordTrie
 
 with open(get_resource_path('f2p-dict.txt'), encoding='utf-8') as f:
-    dictionary = [i.strip().split(' ', 1) for i in f if i.strip()]
-    dictionary = {k.strip(): v.strip() for k, v in dictionary}  # type: dict[str, str]
+    dictionary = {i[0].strip(): i[1].strip() for line in f
+                  if len(i := line.strip().split(' ', 1)) == 2}  # type: dict[str, str]
 
-def f2p_word_internal(word, original_word):
+@lru_cache(maxsize=65536)
+def has_freq_prefix(prefix):
+    """
+    Check whether any frequency word starts with a prefix.
+
+    Answers are cached, so common prefixes are only looked up once per session.
+
+    Args:
+        prefix (str): The prefix to look for.
+
+    Returns:
+        bool: True if at least one word in word_freq starts with the prefix.
+    """
+    return next(word_freq.iterkeys(prefix), None) is not None
+
+def f2p_word_internal(word_letters, original_word_str, cutoff=1):
     """
     Internal function to convert a list of Finglish letters to Persian alternatives.
 
     Args:
-        word (list): List of Finglish letters.
-        original_word (str): The original word for fallback.
+        word_letters (tuple): Finglish letters of one variation of the word.
+        original_word_str (str): The original word, returned as-is for fallback.
+        cutoff (int): Maximum number of alternatives to return.
 
     Returns:
-        list: List of (alternative, confidence) tuples.
+        list: List of (alternative, confidence) tuples, most probable first.
     """
     persian = []
-    for i, letter in enumerate(word):
+    for i, letter in enumerate(word_letters):
         if i == 0:
             converter = beginning
-        elif i == len(word) - 1:
+        elif i == len(word_letters) - 1:
             converter = ending
         else:
             converter = middle
         conversions = converter.get(letter)
         if conversions is None:
-            return [(''.join(original_word), 0.0)]
-        else:
-            conversions = ['' if i == 'nothing' else i for i in conversions]
+            return [(original_word_str, 0.0)]
         persian.append(conversions)
 
-    alternatives = itertools.product(*persian)
-    alternatives = [''.join(i) for i in alternatives]
+    # Walk the trie one letter at a time, dropping partial spellings that no
+    # frequency word starts with. The frontier stays in itertools.product order.
+    frontier = ['']
+    for conversions in persian:
+        frontier = [partial + c for partial in frontier for c in conversions
+                    if not c or has_freq_prefix(partial + c)]
+        if not frontier:
+            break
 
-    alternatives = [(i, word_freq[i]) if i in word_freq else (i, 0)
-                    for i in alternatives]
+    # Keep only the most frequent alternatives; ties stay in product order.
+    alternatives = ((w, word_freq.get(w, _NO_FREQ)[0][0]) for w in frontier)
+    alternatives = heapq.nlargest(cutoff, (a for a in alternatives if a[1]), key=lambda a: a[1])
 
     if len(alternatives) > 0:
-        max_freq = max(freq for _, freq in alternatives)
-        alternatives = [(w, float(freq / max_freq)) if freq != 0 else (w, 0.0)
-                        for w, freq in alternatives]
-    else:
-        alternatives = [(''.join(word), 1.0)]
+        max_freq = alternatives[0][1]
+        alternatives = [(w, float(freq / max_freq)) for w, freq in alternatives]
+
+    # Off-trie fallback: fill up with the leading unscored alternatives so that
+    # words outside the frequency list still get converted.
+    unscored = (''.join(i) for i in itertools.product(*persian))
+    unscored = itertools.islice((w for w in unscored if w not in word_freq), cutoff - len(alternatives))
+    alternatives.extend((w, 0.0) for w in unscored)
 
     return alternatives
 
-def variations(word):
+# Letter combinations recognised by variations_iter()
+_DIGRAPHS = frozenset({'kh', 'gh', 'ch', 'sh', 'zh', 'ck'})
+_VOWEL_APOS = frozenset({"a'", "e'", "o'", "i'", "u'", "A'"})
+_APOS_VOWEL = frozenset({"'a", "'e", "'o", "'i", "'u", "'A"})
+_LONG_VOWELS = {'aa': 'A', 'ee': 'i', 'oo': 'u', 'ou': 'u'}
+_APOS3 = {"'ee": "'i", "'ei": "'i", "'oo": "'u", "'ou": "'u"}
+
+# Segmentations of the rest of the word when it is exactly one of these combinations
+_ENDINGS = {'a': (('A',),), 'ei': (('ei',),), 'kha': (('kha',), ('kh', 'a'))}
+_ENDINGS.update({k: ((v,),) for k, v in _LONG_VOWELS.items()})
+_ENDINGS.update({k: ((v,),) for k, v in _APOS3.items()})
+_ENDINGS.update({k: ((k,),) for k in _DIGRAPHS | _VOWEL_APOS | _APOS_VOWEL})
+
+# (segment, letters consumed) choices for a word starting with a combination
+_PREFIX3 = {'kha': ((('kha',), 3), (('kh', 'a'), 3), (('k', 'h', 'a'), 3))}
+_PREFIX3.update({k: (((v,), 3),) for k, v in _APOS3.items()})
+_PREFIX2 = {k: (((v,), 2),) for k, v in _LONG_VOWELS.items()}
+_PREFIX2.update({k: (((k,), 2), ((k[0],), 1)) for k in _DIGRAPHS})
+_PREFIX2.update({k: (((k,), 2),) for k in _VOWEL_APOS | _APOS_VOWEL})
+
+def _transition(window, at_end):
+    """
+    Work out the segment choices at one position of a word.
+
+    Args:
+        window (str): The next (up to) three letters of the word.
+        at_end (bool): Whether the window holds the rest of the word.
+
+    Returns:
+        tuple: (segment, letters consumed) choices.
+    """
+    if at_end:
+        v = _ENDINGS.get(window)
+        if v is not None:
+            return tuple((segment, len(window)) for segment in v)
+        if len(window) == 1 or (len(window) == 2 and window[0] == window[1]):
+            return (((window[0],), len(window)),)
+    rule = _PREFIX3.get(window) or _PREFIX2.get(window[:2])
+    if rule is None:
+        rule = (((window[0],), 2 if window[0] == window[1] else 1),)
+    return rule
+
+def _build_table(windows, at_end):
+    """
+    Precompute _transition() for a set of windows, sharing equal entries.
+
+    Args:
+        windows (iterable): The windows to precompute.
+        at_end (bool): Whether the windows hold the rest of the word.
+
+    Returns:
+        dict: Mapping from window to (segment, letters consumed) choices.
+    """
+    table = {}
+    shared = {}
+    for window in windows:
+        rule = _transition(window, at_end)
+        table[window] = shared.setdefault(rule, rule)
+    return table
+
+# Transition tables over the Finglish alphabet, keyed on the next three letters of a
+# word or on its last one to three letters. Other windows fall back to _transition().
+_FINGLISH_LETTERS = string.ascii_lowercase + "'"
+_MID_TABLE = _build_table((''.join(p) for p in itertools.product(_FINGLISH_LETTERS, repeat=3)), False)
+_END_TABLE = _build_table((''.join(p) for n in (1, 2, 3) for p in itertools.product(_FINGLISH_LETTERS, repeat=n)), True)
+
+@lru_cache(maxsize=4096)
+def variations_iter(word):
     """
     Create variations of the word based on letter combinations like oo, sh, etc.
 
+    The segmentations are built bottom-up: V[i] holds the segmentations of word[i:],
+    so each suffix is worked out once however many prefixes lead to it. The choices
+    at each position come from a single transition table lookup.
+
     Args:
         word (str): The Finglish word.
 
     Returns:
-        list: List of possible segmentations as lists of letters.
+        tuple: Possible segmentations as tuples of letters.
     """
-    if word == 'a':
-        return [['A']]
-    elif len(word) == 1:
-        return [[word[0]]]
-    elif word == 'aa':
-        return [['A']]
-    elif word == 'ee':
-        return [['i']]
-    elif word == 'ei':
-        return [['ei']]
-    elif word in ['oo', 'ou']:
-        return [['u']]
-    elif word == 'kha':
-        return [['kha'], ['kh', 'a']]
-    elif word in ['kh', 'gh', 'ch', 'sh', 'zh', 'ck']:
-        return [[word]]
-    elif word in ["'ee", "'ei"]:
-        return [["'i"]]
-    elif word in ["'oo", "'ou"]:
-        return [["'u"]]
-    elif word in ["a'", "e'", "o'", "i'", "u'", "A'"]:
-        return [[word[0] + "'"]]
-    elif word in ["'a", "'e", "'o", "'i", "'u", "'A"]:
-        return [["'" + word[1]]]
-    elif len(word) == 2 and word[0] == word[1]:
-        return [[word[0]]]
-
-    if word[:2] == 'aa':
-        return [['A'] + i for i in variations(word[2:])]
-    elif word[:2] == 'ee':
-        return [['i'] + i for i in variations(word[2:])]
-    elif word[:2] in ['oo', 'ou']:
-        return [['u'] + i for i in variations(word[2:])]
-    elif word[:3] == 'kha':
-        return \
-            [['kha'] + i for i in variations(word[3:])] + \
-            [['kh', 'a'] + i for i in variations(word[3:])] + \
-            [['k', 'h', 'a'] + i for i in variations(word[3:])]
-    elif word[:2] in ['kh', 'gh', 'ch', 'sh', 'zh', 'ck']:
-        return \
-            [[word[:2]] + i for i in variations(word[2:])] + \
-            [[word[0]] + i for i in variations(word[1:])]
-    elif word[:2] in ["a'", "e'", "o'", "i'", "u'", "A'"]:
-        return [[word[:2]] + i for i in variations(word[2:])]
-    elif word[:3] in ["'ee", "'ei"]:
-        return [["'i"] + i for i in variations(word[3:])]
-    elif word[:3] in ["'oo", "'ou"]:
-        return [["'u"] + i for i in variations(word[3:])]
-    elif word[:2] in ["'a", "'e", "'o", "'i", "'u", "'A"]:
-        return [[word[:2]] + i for i in variations(word[2:])]
-    elif len(word) >= 2 and word[0] == word[1]:
-        return [[word[0]] + i for i in variations(word[2:])]
-    else:
-        return [[word[0]] + i for i in variations(word[1:])]
+    V = [None] * (len(word) + 1)
+    V[len(word)] = ((),)
+    end = len(word) - 3
+    for i in range(len(word) - 1, -1, -1):
+        window = word[i:i + 3]
+        rule = (_END_TABLE if i >= end else _MID_TABLE).get(window)
+        if rule is None:
+            rule = _transition(window, i >= end)
+        if len(rule) == 1 and len(V[i + rule[0][1]]) == 1:
+            # Only one way to go on from here, the common case for plain letters
+            head, k = rule[0]
+            V[i] = (head + V[i + k][0],)
+        else:
+            V[i] = tuple(head + s for head, k in rule for s in V[i + k])
+    return V[0]
+
+# Segmentations of short words, which make up much of Persian text (be, ke, ra, ...),
+# worked out once at import: every one or two letter word plus the table combinations
+_PRECOMPUTE_WORDS = {''.join(p) for n in (1, 2) for p in itertools.product(_FINGLISH_LETTERS, repeat=n)}
+_PRECOMPUTE_WORDS.update(k.lower() for table in (beginning, middle, ending, _ENDINGS) for k in table)
+_VARIATIONS_CACHE = {w: variations_iter.__wrapped__(w) for w in _PRECOMPUTE_WORDS}  # type: dict[str, tuple]
 
+@lru_cache(maxsize=8192)
 def f2p_word(word, max_word_size=15, cutoff=1):
     """
     Convert a single word from Finglish to Persian.
@@ -179,61 +250,82 @@ def f2p_word(word, max_word_size=15, cutoff=1):
         cutoff (int): The cut-off point. For each word, there could be many possibilities.
         By default, 3 of these possibilities are considered for each word.
 
+    Results are cached; call f2p_word.cache_clear() to reset the cache.
+
     Returns:
-        list: List of (persian_word, confidence) tuples.
+        tuple: Tuple of (persian_word, confidence) tuples.
     """
     original_word = word
     word = word.lower()
 
     c = dictionary.get(word)
     if c:
-        return [(c, 1.0)]
+        return ((c, 1.0),)
 
     if word == '':
-        return []
+        return ()
     elif len(word) > max_word_size:
-        return [(original_word, 1.0)]
+        return ((original_word, 1.0),)
+
+    segmentations = _VARIATIONS_CACHE.get(word)
+    if segmentations is None:
+        segmentations = variations_iter(word)
 
     results = []
-    for w in variations(word):
-        results.extend(f2p_word_internal(w, original_word))
+    for w in segmentations:
+        results.extend(f2p_word_internal(w, original_word, cutoff))
 
-    # Sort results based on the confidence value
-    results.sort(key=lambda r: r[1], reverse=True)
+    # Return the top results based on the confidence value in order to cut down
+    # on the number of possibilities.
+    return tuple(heapq.nlargest(cutoff, results, key=lambda r: r[1]))
 
-    # Return the top results in order to cut down on the number of possibilities.
-    return results[:cutoff]
+def f2p_words_batch(words, max_word_size=15, cutoff=1):
+    """
+    Convert several Finglish words at once.
+
+    Each distinct word is converted only once, which pays off on real text where
+    the same words keep coming back.
+
+    Args:
+        words (list): The Finglish words to convert.
+        max_word_size (int): Maximum size of the words to consider.
+        cutoff (int): The cut-off point for number of alternatives per word.
+
+    Returns:
+        list: One tuple of (persian_word, confidence) tuples per word, in the same order as words.
+    """
+    mapping = {w: f2p_word(w, max_word_size, cutoff) for w in dict.fromkeys(words)}
+    return [mapping[w] for w in words]
 
 def f2p_list(phrase, max_word_size=15, cutoff=1):
     """
     Convert a phrase from Finglish to Persian while preserving punctuation.
 
+    Punctuation is returned unchanged; translate the joined text with _PUNCT_TABLE
+    to get the Persian question mark and comma, as f2p() does.
+
     Args:
         phrase (str): The phrase to convert.
         max_word_size (int): Maximum size of the words to consider.
         cutoff (int): The cut-off point for number of alternatives per word.
 
     Returns:
-        list: List of lists, each sub-list contains possibilities for each word as (word, confidence) pairs.
+        list: List of tuples, each tuple contains possibilities for each word as (word, confidence) pairs.
     """
-    # Split the phrase into words and punctuation
-    tokens = word_and_punct_regex.findall(phrase)
+    # Split the phrase into (kind, token) pairs of words, punctuation and whitespace
+    tokens = [(m.lastgroup, m.group()) for m in word_and_punct_regex.finditer(phrase)]
+
+    # Convert all the words in one batch
+    words = [token for kind, token in tokens if kind == 'w']
+    converted = iter(f2p_words_batch(words, max_word_size, cutoff))
 
-    # Process each token: convert words, leave punctuation unchanged
+    # Process each token: take the converted words, leave whitespace and punctuation unchanged
     results = []
-    for token in tokens:
-        if token.isspace():
-            results.append([(token, 1.0)])
-        elif token.isalnum():  # If the token is a word
-            converted = f2p_word(token, max_word_size, cutoff)
-            results.append(converted)
-        else:  # If the token is punctuation
-            # Map ? and , to Persian equivalents
-            if token == '?':
-                token = '؟'
-            elif token == ',':
-                token = '،'
-            results.append([(token, 1.0)])
+    for kind, token in tokens:
+        if kind == 'w':  # If the token is a word
+            results.append(next(converted))
+        else:
+            results.append(((token, 1.0),))
 
     return results
 
@@ -255,5 +347,6 @@ def f2p(phrase, max_word_size=15, cutoff=1):
     for i in results:
         token = i[0][0]  # Get the most probable translation or punctuation
         output.append(token)
-    
-    return ''.join(output)
+
+    # Map ? and , to Persian equivalents
+    return ''.join(output).translate(_PUNCT_TABLE)
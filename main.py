@@ -10,38 +10,63 @@ from pynput import keyboard
 import pyperclip
 from finglish import f2p
 from threading import Thread  # to run tray + hotkey together
+from concurrent.futures import ThreadPoolExecutor  # to convert off the listener thread
 from tray import tray
 import sys
 
-# Define hotkey combo: Ctrl + F9
-COMBO = {keyboard.Key.ctrl_l, keyboard.Key.f9}
-current_keys = set()
+# Define hotkey combo: Ctrl + F9, one bit per key
+KEY_BIT = {keyboard.Key.ctrl_l: 1, keyboard.Key.f9: 2}
+COMBO_MASK = 3  # Every key of the combo held down
+_mask = 0  # Bits of the combo keys currently held down
+
+# Conversions run on a single worker thread so long texts don't block the key listener
+_executor = ThreadPoolExecutor(max_workers=1)
+_in_flight = False
+
+def _convert_and_copy(text):
+    """
+    Converts text from Finglish to Persian on the worker thread and updates the clipboard.
+    """
+    global _in_flight
+    try:
+        try:
+            result = f2p(text)
+        except Exception as e:
+            # If conversion fails, do nothing
+            return
+        pyperclip.copy(result)
+    finally:
+        _in_flight = False
 
 def on_press(key):
     """
     Handles key press events. If the defined hotkey combination is pressed,
-    converts clipboard text from Finglish to Persian and updates the clipboard.
+    hands the clipboard text to the worker thread for conversion from Finglish to Persian.
     """
-    if key in COMBO:
-        current_keys.add(key)
+    global _mask, _in_flight
+    bit = KEY_BIT.get(key)
+    if bit:
+        _mask |= bit
+
+    if _mask == COMBO_MASK:
+        if _in_flight:
+            # A conversion is already running; ignore the repeated hotkey
+            return
 
-    if COMBO.issubset(current_keys):
         text = pyperclip.paste()
 
         if text:
-            try:
-                result = f2p(text)
-            except Exception as e:
-                # If conversion fails, do nothing
-                return
-            pyperclip.copy(result)
+            _in_flight = True
+            _executor.submit(_convert_and_copy, text)
 
 def on_release(key):
     """
-    Handles key release events. Removes released keys from the current_keys set.
+    Handles key release events. Clears the bits of released combo keys from the mask.
     """
-    if key in current_keys:
-        current_keys.remove(key)
+    global _mask
+    bit = KEY_BIT.get(key)
+    if bit:
+        _mask &= ~bit
 
 def start_hotkey_listener():
     """
@@ -61,6 +86,7 @@ def on_quit():
     Stops the keyboard listener and exits the program.
     """
     listener.stop()  # Stops the key listener
+    _executor.shutdown(wait=False, cancel_futures=True)  # Drops pending conversions
     sys.exit(0)  # Exit the application
 
 if __name__ == "__main__":
@@ -24,9 +24,14 @@ sys.path.pop(0)
 
 @pytest.fixture(autouse=True)
 def reset_clipboard():
-    """Automatically reset main._clipboard before each test."""
+    """Automatically reset main._clipboard and the in-flight flag before each test."""
     if hasattr(main, "_clipboard"):
         delattr(main, "_clipboard")
+    main._in_flight = False
+
+def wait_for_conversion():
+    """Wait until the worker thread has finished any submitted conversion."""
+    main._executor.submit(lambda: None).result()
 
 def load_bulk_f2p_cases():
     test_file = os.path.join(os.path.dirname(__file__), "test.txt")
@@ -55,8 +60,9 @@ def test_f2p_conversion(monkeypatch):
     monkeypatch.setattr("finglish.f2p", lambda x: expected_result)
 
     # Simulate hotkey press
-    main.current_keys = set(main.COMBO)
-    main.on_press(next(iter(main.COMBO)))  # Call with one key
+    main._mask = main.COMBO_MASK
+    main.on_press(next(iter(main.KEY_BIT)))  # Call with one key
+    wait_for_conversion()
     # The clipboard should now contain the expected result
     assert getattr(main, "_clipboard", None) == expected_result
 
@@ -66,8 +72,9 @@ def test_f2p_conversion_empty_clipboard(monkeypatch):
     monkeypatch.setattr("pyperclip.copy", lambda x: setattr(main, "_clipboard", x))
     monkeypatch.setattr("finglish.f2p", lambda x: "should not be called")
 
-    main.current_keys = set(main.COMBO)
-    main.on_press(next(iter(main.COMBO)))
+    main._mask = main.COMBO_MASK
+    main.on_press(next(iter(main.KEY_BIT)))
+    wait_for_conversion()
     # Clipboard should not be updated
     assert getattr(main, "_clipboard", None) is None
 
@@ -78,10 +85,25 @@ def test_f2p_conversion_exception(monkeypatch):
     def raise_exc(x): raise Exception("f2p error")
     monkeypatch.setattr("main.f2p", raise_exc)
 
-    main.current_keys = set(main.COMBO)
-    main.on_press(next(iter(main.COMBO)))
+    main._mask = main.COMBO_MASK
+    main.on_press(next(iter(main.KEY_BIT)))
+    wait_for_conversion()
     # Clipboard should not be updated due to exception
     assert getattr(main, "_clipboard", None) is None
+    # The worker should be ready for the next hotkey
+    assert main._in_flight is False
+
+def test_f2p_conversion_ignored_while_in_flight(monkeypatch):
+    """Test that the hotkey is ignored while a conversion is still running."""
+    monkeypatch.setattr("pyperclip.paste", lambda: "salam")
+    monkeypatch.setattr("pyperclip.copy", lambda x: setattr(main, "_clipboard", x))
+
+    main._in_flight = True
+    main._mask = main.COMBO_MASK
+    main.on_press(next(iter(main.KEY_BIT)))
+    wait_for_conversion()
+    # Clipboard should not be updated for the repeated hotkey
+    assert getattr(main, "_clipboard", None) is None
 
 def test_f2p_preserves_spaces_and_punctuation():
     """Test that spaces and punctuation are preserved and converted correctly."""
@@ -108,19 +130,34 @@ def test_f2p_handles_only_punctuation():
     assert f2p(",") == "،"
     assert f2p(" , ? ") == " ، ؟ "
 
+def test_f2p_list_leaves_punctuation_unchanged():
+    """Test that f2p_list passes punctuation through and only f2p maps it."""
+    from finglish import f2p_list
+
+    tokens = [t[0][0] for t in f2p_list("salam, khoobi?")]
+    assert tokens == ["سلام", ",", " ", "خوبی", "?"]
+
+def test_f2p_words_batch_matches_f2p_word():
+    """Test that batch conversion keeps the input order and handles repeated words."""
+    from finglish import f2p_word, f2p_words_batch
+
+    words = ["salam", "khoobi", "salam", "Salam", "123"]
+    assert f2p_words_batch(words) == [f2p_word(w) for w in words]
+    assert f2p_words_batch([]) == []
+
 def test_on_release_removes_key():
-    """Test that on_release removes the key from current_keys."""
-    main.current_keys = set(main.COMBO)
-    key = next(iter(main.COMBO))
+    """Test that on_release clears the key's bit from the mask."""
+    main._mask = main.COMBO_MASK
+    key = next(iter(main.KEY_BIT))
     main.on_release(key)
-    assert key not in main.current_keys
+    assert not main._mask & main.KEY_BIT[key]
 
 def test_on_press_adds_key():
-    """Test that on_press adds the key to current_keys."""
-    main.current_keys = set()
-    key = next(iter(main.COMBO))
+    """Test that on_press sets the key's bit in the mask."""
+    main._mask = 0
+    key = next(iter(main.KEY_BIT))
     main.on_press(key)
-    assert key in main.current_keys
+    assert main._mask & main.KEY_BIT[key]
 
 @pytest.mark.skip("Integration test: requires GUI event loop and tray, run manually if needed.")
 def test_tray_and_listener_integration():